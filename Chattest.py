@@ -1,7 +1,16 @@
 import streamlit as st
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
+import orjson
 import os
+import re
+import sqlite3
+import time
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from urllib.parse import quote_plus
 from google import genai
 from google.genai import types
 
@@ -20,98 +29,264 @@ except KeyError:
     st.info("To use the Yelp search, please add your YELP_API_KEY to your secrets.toml file.")
     YELP_API_KEY = None
 
+
 # Initialize the Gemini Client
+@st.cache_resource
+def get_gemini_client():
+    """Builds the Gemini client once per process; reruns and sessions share it."""
+    return genai.Client(api_key=GEMINI_API_KEY)
+
+
 try:
-    gemini_client = genai.Client(api_key=GEMINI_API_KEY)
+    gemini_client = get_gemini_client()
 except Exception as e:
     st.error(f"Error initializing Gemini client: {e}")
     st.stop()
 
+# Generation model shared by the chat, info and extraction calls
+GEMINI_MODEL = 'gemini-2.5-flash'
+
+
+# ------------------- Shared Term Sets -------------------
+# Strings the model (or memory) may hand back in place of a real value
+NULL_STRINGS = frozenset({"null", "none", "n/a", ""})
+# Greetings and generic words that are never a usable food search term
+GENERIC_TERMS = frozenset({"hi", "hello", "hey", "food", "restaurant", "meal"})
+# Inputs made only of punctuation, emoji or whitespace (e.g. "?", "👋", "...")
+NON_WORD_INPUT = re.compile(r"\W*")
+
+
+# ------------------- Conversation Limits -------------------
+# At most this many recent turns (one user message + one AI reply each) are sent
+# to Gemini as chat context, so per-call tokens stay bounded in long sessions.
+MAX_HISTORY_TURNS = 10
+# Hard cap on the messages kept in session state (oldest are evicted first).
+MAX_MESSAGES = 200
+# Only the newest messages get their own chat bubble; older ones share one block.
+MAX_RENDERED_BUBBLES = 20
+
 
 # ------------------- Gemini Conversational Response -------------------
 
+CHAT_SYSTEM_INSTRUCTION = (
+    "You are a friendly and enthusiastic AI Restaurant Finder, now using Yelp for search. "
+    "Your primary goal is to help the user find food and location. When the user doesn't specify a city or food, "
+    "you must gently prompt them to provide that information to continue the search. Keep your responses short and welcoming, and always "
+    "steer the conversation back toward a search query (City and Food). If the user just says 'hi' or 'hello', "
+    "greet them warmly and ask for their desired food and location."
+)
+
+
+@st.cache_resource
+def get_chat_config():
+    """Builds the chat config once per process instead of on every script rerun."""
+    return types.GenerateContentConfig(system_instruction=CHAT_SYSTEM_INSTRUCTION)
+
+
+CHAT_CONFIG = get_chat_config()
+
+
 def generate_chat_response(user_input, chat_history):
     """
     Generates a conversational response for non-search queries using a standard
     chat model, leveraging the conversation history for context.
+    chat_history is the already formatted list of Gemini Content entries, already
+    limited to the chat window by append_message.
+    Yields the reply in text chunks as Gemini streams it.
     """
-    history_for_gemini = []
-
-    # Format the Streamlit history for the Gemini API
-    for role, text in chat_history:
-        # Clean up the AI's displayed text before feeding it back into the model's history
-        clean_text = text.replace('🤖', '').strip()
-
-        if role == 'user':
-            history_for_gemini.append(types.Content(role='user', parts=[types.Part(text=text)]))
-        elif role == 'ai_result':
-            history_for_gemini.append(types.Content(role='model', parts=[types.Part(text=clean_text)]))
-
-    system_instruction = (
-        "You are a friendly and enthusiastic AI Restaurant Finder, now using Yelp for search. "
-        "Your primary goal is to help the user find food and location. When the user doesn't specify a city or food, "
-        "you must gently prompt them to provide that information to continue the search. Keep your responses short and welcoming, and always "
-        "steer the conversation back toward a search query (City and Food). If the user just says 'hi' or 'hello', "
-        "greet them warmly and ask for their desired food and location."
-    )
-
     try:
         chat_session = gemini_client.chats.create(
-            model='gemini-2.5-flash',
-            history=history_for_gemini,
-            config=types.GenerateContentConfig(
-                system_instruction=system_instruction
-            )
+            model=GEMINI_MODEL,
+            history=chat_history,
+            config=CHAT_CONFIG
         )
 
-        response = chat_session.send_message(user_input)
-        return response.text
+        for chunk in chat_session.send_message_stream(user_input):
+            if chunk.text:
+                yield chunk.text
 
     except Exception as e:
         st.error(f"Gemini Chat Error: {e}")
-        return "I seem to be having trouble connecting to the chat service right now. Please try a food and location search."
+        yield "I seem to be having trouble connecting to the chat service right now. Please try a food and location search."
 
 
 # ------------------- Gemini Informational Response -------------------
 
+INFO_SYSTEM_INSTRUCTION = (
+    "You are an expert culinary guide and local food culture specialist. "
+    "Your task is to provide engaging and accurate suggestions about popular foods, cultural dishes, or dining tips "
+    "based on the user's query and location context. Use bullet points for easy reading if suggesting multiple dishes. "
+    "Do not offer to perform a Yelp search, redirect the topic, or suggest a different cuisine. Your response must be solely about the food and culture of the location specified in the query."
+)
+
+
+@st.cache_resource
+def get_info_config():
+    """Builds the info config once per process instead of on every script rerun."""
+    return types.GenerateContentConfig(system_instruction=INFO_SYSTEM_INSTRUCTION)
+
+
+INFO_CONFIG = get_info_config()
+
+
 def generate_info_response(query, city=None):
     """
     Generates a response for informational queries (suggestions, culture, etc.).
     Uses the current query and extracted city for context.
+    Yields the reply in text chunks as Gemini streams it.
     """
 
     city_context = f" in {city}" if city else ""
 
     prompt = f"The user asked about popular food{city_context} with the query: '{query}'. Provide a concise, engaging response about the cuisine of {city if city else 'the region mentioned in the query'}."
 
-    system_instruction = (
-        "You are an expert culinary guide and local food culture specialist. "
-        "Your task is to provide engaging and accurate suggestions about popular foods, cultural dishes, or dining tips "
-        "based on the user's query and location context. Use bullet points for easy reading if suggesting multiple dishes. "
-        "Do not offer to perform a Yelp search, redirect the topic, or suggest a different cuisine. Your response must be solely about the food and culture of the location specified in the query."
-    )
-
     try:
-        response = gemini_client.models.generate_content(
-            model='gemini-2.5-flash',
+        stream = gemini_client.models.generate_content_stream(
+            model=GEMINI_MODEL,
             contents=prompt,
-            config=types.GenerateContentConfig(
-                system_instruction=system_instruction
-            )
+            config=INFO_CONFIG
         )
-        return response.text
+        for chunk in stream:
+            if chunk.text:
+                yield chunk.text
 
     except Exception as e:
         st.error(f"Gemini Info Generation Error: {e}")
-        return "I'm having trouble retrieving culinary information right now. Please try a specific food or location search."
+        yield "I'm having trouble retrieving culinary information right now. Please try a specific food or location search."
+
+
+# ------------------- Semantic Extraction Cache -------------------
+# Paraphrases ("sushi in nyc" / "find sushi nyc please") reuse an earlier extraction
+# when their embeddings are close enough; an embedding call is far cheaper than a
+# generation call.
+EMBEDDING_MODEL = 'gemini-embedding-001'
+SEMANTIC_CACHE_SIZE = 256
+SEMANTIC_SIMILARITY_THRESHOLD = 0.92
+
+
+@st.cache_resource
+def get_embedding_config():
+    """Builds the embedding config once per process instead of on every script rerun."""
+    return types.EmbedContentConfig(output_dimensionality=768)
+
+
+EMBEDDING_CONFIG = get_embedding_config()
+
+
+def embed_text(text):
+    """Returns a unit-length embedding of text, or None if it can't be computed."""
+    try:
+        response = gemini_client.models.embed_content(
+            model=EMBEDDING_MODEL,
+            contents=text,
+            config=EMBEDDING_CONFIG
+        )
+        vector = np.asarray(response.embeddings[0].values, dtype=np.float32)
+    except Exception:
+        # The semantic cache is only an optimization; extraction proceeds without it
+        return None
+
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+
+def words_of(text):
+    """The set of normalized words in text (same normalization as the search keys)."""
+    return set(re.findall(r"\w+", normalize_term(text)))
+
+
+def surface_forms(value, aliases):
+    """
+    The ways a user may have typed a cached city or food: the value itself, its
+    leading part before any ", state/country" suffix the model added, and every
+    alias that resolves to the same normalized key.
+    """
+    key = normalize_term(value)
+    canonical = aliases.get(key, key)
+    forms = {key, key.split(",")[0], canonical.split(",")[0]}
+    forms.update(alias for alias, target in aliases.items() if target == canonical)
+    return forms
+
+
+def find_similar_extraction(normalized_input, query_vector):
+    """
+    Returns the cached extraction of a paraphrase of normalized_input, or None.
+    Besides clearing SEMANTIC_SIMILARITY_THRESHOLD, the cached city and food must
+    each appear in the new input under one of their surface forms ("new york" or
+    "nyc" for 'New York, USA'), so "sushi in new orleans" never reuses "sushi in
+    new york" and "sushi in la" never reuses "sushi in nyc".
+    """
+    vectors = st.session_state.semantic_vectors
+    if vectors is None:
+        return None
+
+    # Rows are unit vectors, so the dot product is the cosine similarity
+    similarities = vectors @ query_vector
+    best = int(np.argmax(similarities))
+    if similarities[best] < SEMANTIC_SIMILARITY_THRESHOLD:
+        return None
+
+    results = st.session_state.semantic_results
+    cached = results[best]
+    input_words = words_of(normalized_input)
+    for value, aliases in zip(cached[:2], (CITY_ALIASES, FOOD_ALIASES)):
+        if value and not any(words_of(form) <= input_words for form in surface_forms(value, aliases)):
+            return None
+
+    # Move the hit to the most recently used end so eviction stays LRU
+    order = [i for i in range(len(results)) if i != best] + [best]
+    st.session_state.semantic_vectors = vectors[order]
+    results.append(results.pop(best))
+    return cached
+
+
+def remember_extraction(normalized_input, query_vector, result):
+    """
+    Records an extraction in this session's exact-match memo and, when an embedding
+    is available, in the semantic cache; both evict the least recently used.
+    """
+    memo = st.session_state.extraction_memo
+    memo[normalized_input] = result
+    if len(memo) > SEMANTIC_CACHE_SIZE:
+        del memo[next(iter(memo))]
+
+    if query_vector is None:
+        return
+    vectors = st.session_state.semantic_vectors
+    results = st.session_state.semantic_results
+
+    vectors = query_vector[np.newaxis, :] if vectors is None else np.vstack([vectors, query_vector])
+    results.append(result)
+    if len(results) > SEMANTIC_CACHE_SIZE:
+        vectors = vectors[1:]
+        del results[0]
+    st.session_state.semantic_vectors = vectors
 
 
 # ------------------- Gemini Structured Extraction & Intent Classification -------------------
 
-def extract_structured_info(user_input):
+EXTRACTION_SYSTEM_INSTRUCTION = (
+    "You are an expert entity extraction and intent classification system. "
+    "Analyze the user's request. "
+    "If the input contains transliterated or colloquial language, first translate the food item into formal English. "
+    "Then, extract the City/Location and the desired Food/Cuisine. "
+    "Classify the user's primary intent as 'SEARCH', 'INFO', or 'CHAT'. "
+    "Return the result strictly in the provided JSON schema. "
+    "IMPORTANT: You MUST extract the location/city if one is mentioned. "
+    "If the food term is highly generic (e.g., 'food', 'restaurant', 'meal') or a greeting, return null for the 'food' field. "
+    "If a city is not explicitly mentioned, return null for 'city'. "
+    "For INFO, also write the 'reply' shown to the user: a concise, engaging answer about the popular foods "
+    "and food culture of the location in the query, using bullet points when suggesting multiple dishes. "
+    "For SEARCH and CHAT, return null for 'reply'."
+)
+
+
+@st.cache_resource
+def get_extraction_config():
     """
-    Uses the Gemini API to reliably extract the city, food type, and classify the intent
-    from the user's natural language input, forcing a JSON output structure.
+    Builds the extraction schema tree and its JSON-mode config. Both are immutable,
+    and the Schema objects are validated on construction, so they are built once
+    per process instead of on every script rerun.
     """
     extraction_schema = types.Schema(
         type=types.Type.OBJECT,
@@ -129,82 +304,332 @@ def extract_structured_info(user_input):
                 enum=["SEARCH", "INFO", "CHAT"],
                 description="Classify the user's primary goal: SEARCH (finding restaurants/food listing in a certain address atleast the food or the address should be specified), INFO (asking for popular foods in certain countries not restaurants, it has to be a question), or CHAT (only for greeting/general talk)"
             ),
+            "reply": types.Schema(
+                type=types.Type.STRING,
+                description="The user-facing message for INFO. Null for SEARCH and CHAT."
+            ),
         })
 
-    system_instruction = (
-        "You are an expert entity extraction and intent classification system. "
-        "Analyze the user's request. "
-        "If the input contains transliterated or colloquial language, first translate the food item into formal English. "
-        "Then, extract the City/Location and the desired Food/Cuisine. "
-        "Classify the user's primary intent as 'SEARCH', 'INFO', or 'CHAT'. "
-        "Return the result strictly in the provided JSON schema. "
-        "IMPORTANT: You MUST extract the location/city if one is mentioned. "
-        "If the food term is highly generic (e.g., 'food', 'restaurant', 'meal') or a greeting, return null for the 'food' field. "
-        "If a city is not explicitly mentioned, return null for 'city'."
+    return types.GenerateContentConfig(
+        system_instruction=EXTRACTION_SYSTEM_INSTRUCTION,
+        response_mime_type="application/json",
+        response_schema=extraction_schema
     )
 
-    try:
-        response = gemini_client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=user_input,
-            config=types.GenerateContentConfig(
-                system_instruction=system_instruction,
-                response_mime_type="application/json",
-                response_schema=extraction_schema
-            ),
-        )
 
-        data = json.loads(response.text)
+EXTRACTION_CONFIG = get_extraction_config()
 
-        # 1. Get and strip the strings
-        city = data.get('city', '').strip()
-        food = data.get('food', '').strip()
-        intent = data.get('intent', 'CHAT').upper().strip()
 
-        # 2. VITAL FIX: Explicitly convert the literal string "null", "none", or empty strings to Python None
-        null_or_empty_or_none = ["null", "none", ""]
-        if city.lower() in null_or_empty_or_none:
-            city = None
-        if food.lower() in null_or_empty_or_none:
-            food = None
+@st.cache_data(max_entries=512, show_spinner=False)
+def run_extraction(normalized_input, _raw_input):
+    """
+    Sends the user's original text (_raw_input) through the Gemini extraction call
+    and returns (city, food, intent, reply). Memoized process-wide under
+    normalized_input only (st.cache_data survives script reruns, unlike a
+    functools cache, and skips the underscore argument when hashing): the model
+    still sees the original casing, so "LA" or "US" isn't read as "la" or "us".
+    API and parsing failures raise, so they are never cached. Must stay pure: no
+    session state.
+    """
+    response = gemini_client.models.generate_content(
+        model=GEMINI_MODEL,
+        contents=_raw_input,
+        config=EXTRACTION_CONFIG,
+    )
+
+    data = orjson.loads(response.text)
 
-        # 3. Final check for common greetings/generic search terms from the original input
-        generic_terms = ["hi", "hello", "hey", "food", "restaurant", "meal"]
-        if food and food.lower() in generic_terms:
-            food = None
-        if user_input.lower().strip() in generic_terms:
-            return None, None, 'CHAT'
+    # 1. Get and strip the strings
+    city = (data.get('city') or '').strip()
+    food = (data.get('food') or '').strip()
+    intent = (data.get('intent') or 'CHAT').upper().strip()
+    reply = (data.get('reply') or '').strip()
 
-        return city, food, intent
+    # 2. VITAL FIX: Explicitly convert the literal string "null", "none", or empty strings to Python None
+    if city.lower() in NULL_STRINGS:
+        city = None
+    if food.lower() in NULL_STRINGS:
+        food = None
+    if reply.lower() in NULL_STRINGS:
+        reply = None
+
+    # 3. Final check for generic search terms the model passed through as food
+    if food and food.lower() in GENERIC_TERMS:
+        food = None
+
+    return city, food, intent, reply
+
+
+def extract_structured_info(user_input):
+    """
+    Uses the Gemini API to reliably extract the city, food type, and classify the intent
+    from the user's natural language input, forcing a JSON output structure.
+    In the same call the model also drafts the user-facing reply for INFO turns, so
+    those need no second Gemini round-trip.
+    Returns (city, food, intent, reply); reply is None when no draft is available.
+    """
+    # Lowercase and collapse whitespace so trivially different inputs share a cache entry
+    normalized_input = " ".join(user_input.lower().split())
+
+    # Greetings, bare generic terms and word-less input never need the model: answer
+    # them locally and skip the API round-trip entirely.
+    if normalized_input in GENERIC_TERMS or NON_WORD_INPUT.fullmatch(normalized_input):
+        return None, None, 'CHAT', None
+
+    # Exact repeats are answered from this session's memo before anything else, so
+    # only a memo miss pays for the embedding call. The semantic cache is also per
+    # session: a paraphrase hit is never shared through the process-wide memo.
+    memo = st.session_state.extraction_memo
+    if normalized_input in memo:
+        memo[normalized_input] = memo.pop(normalized_input)
+        return memo[normalized_input]
+
+    query_vector = embed_text(normalized_input)
+    if query_vector is not None:
+        cached = find_similar_extraction(normalized_input, query_vector)
+        if cached:
+            remember_extraction(normalized_input, None, cached)
+            return cached
+
+    try:
+        result = run_extraction(normalized_input, user_input)
+        remember_extraction(normalized_input, query_vector, result)
+        return result
 
     except Exception as e:
         st.error(f"Gemini API or Parsing Error: {e}")
-        return None, None, 'CHAT'
+        return None, None, 'CHAT', None
 
 
 # ------------------- Yelp API (Re-implemented) -------------------
+YELP_SEARCH_URL = "https://api.yelp.com/v3/businesses/search"
+MAPS_SEARCH_URL = "https://www.google.com/maps/search/?api=1&query="
+
+# Surface forms that mean the same search. These only build cache keys; Yelp always
+# receives the user's original wording. Keys are normalized (lowercase, periods
+# dropped, other punctuation turned into spaces), so "NYC", "nyc." and "Nyc" all
+# collapse onto one entry.
+CITY_ALIASES = {
+    "nyc": "new york, ny",
+    "new york": "new york, ny",
+    "new york city": "new york, ny",
+    "new york, usa": "new york, ny",
+    "la": "los angeles, ca",
+    "los angeles": "los angeles, ca",
+    "los angeles, usa": "los angeles, ca",
+    "sf": "san francisco, ca",
+    "san francisco": "san francisco, ca",
+    "san francisco, usa": "san francisco, ca",
+    "dc": "washington, dc",
+    "washington dc": "washington, dc",
+    "chi town": "chicago, il",
+    "chicago": "chicago, il",
+    "chicago, usa": "chicago, il",
+}
+FOOD_ALIASES = {
+    "sushi rolls": "sushi",
+    "sushi roll": "sushi",
+    "pizzas": "pizza",
+    "burgers": "burger",
+    "hamburgers": "burger",
+    "tacos": "taco",
+    "noodles": "noodle",
+    "ramen noodles": "ramen",
+}
+
+# (connect, read) timeouts so a stalled Yelp connection can't hold the worker
+YELP_TIMEOUT = (2, 3)
+# Retries after the first attempt, for 429 and transient 5xx responses
+YELP_RETRIES = 1
+# Fixed pause, in seconds, before each retry, so a 429 isn't re-sent immediately
+YELP_RETRY_DELAY = 0.5
+# Cap, in seconds, on how long a turn waits for a search: every attempt at full
+# connect/read timeout plus the retry pauses. The read timeout bounds each socket
+# read, not the whole response, so a trickling response can still run longer; it
+# then finishes in the background and only fills the cache.
+YELP_SEARCH_DEADLINE = (YELP_RETRIES + 1) * sum(YELP_TIMEOUT) + YELP_RETRIES * YELP_RETRY_DELAY + 1
+# Workers dedicated to Yelp searches and prefetches, shared by all sessions
+YELP_POOL_WORKERS = 16
+YELP_RESULT_LIMIT = 5
+
+# Successful searches are cached in SQLite for an hour, so they survive process
+# restarts and are shared by every session
+YELP_CACHE_TTL = 3600
+YELP_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".yelp_cache.sqlite3")
+
+
+class FixedDelayRetry(Retry):
+    """
+    Retry policy that pauses YELP_RETRY_DELAY before every retry. urllib3's
+    exponential backoff is zero until the second consecutive error, so with a
+    single retry it would re-send a rate-limited request immediately.
+    """
+
+    def get_backoff_time(self):
+        return YELP_RETRY_DELAY
+
+
+@st.cache_resource
+def get_yelp_session():
+    """
+    Builds one pooled keep-alive session for every Yelp call, so repeat searches
+    reuse the open TCP/TLS connection instead of paying a fresh handshake each time.
+    Rate-limit (429) and transient 5xx responses are retried after a fixed short
+    pause before surfacing; Retry-After is ignored, since an uncapped
+    server-requested wait would blow through YELP_SEARCH_DEADLINE. Cached as a
+    resource because the script re-executes on every rerun and would otherwise
+    drop the pool.
+    """
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=YELP_POOL_WORKERS,
+        max_retries=FixedDelayRetry(
+            total=YELP_RETRIES,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET"],
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        ),
+    ))
+    if YELP_API_KEY:
+        session.headers.update({"Authorization": f"Bearer {YELP_API_KEY}"})
+    return session
+
+
+@st.cache_resource
+def get_yelp_pool():
+    """
+    Worker threads reserved for Yelp searches and prefetches, so they can overlap
+    the Gemini calls. Sized for several concurrent sessions; the connect/read
+    timeouts and the single retry keep a slow search from holding a worker for long.
+    """
+    return ThreadPoolExecutor(max_workers=YELP_POOL_WORKERS, thread_name_prefix="yelp")
+
+
+yelp_session = get_yelp_session()
+yelp_pool = get_yelp_pool()
+
+
+@st.cache_resource
+def init_yelp_cache():
+    """Creates the persistent Yelp cache schema once per process."""
+    with closing(sqlite3.connect(YELP_CACHE_PATH, timeout=1)) as conn, conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS yelp_cache "
+            "(key TEXT PRIMARY KEY, payload BLOB NOT NULL, expires_at INTEGER NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS yelp_cache_expires_at ON yelp_cache (expires_at)")
+    return YELP_CACHE_PATH
+
+
+def open_yelp_cache():
+    """Opens a connection to the persistent Yelp cache (schema already in place)."""
+    return sqlite3.connect(init_yelp_cache(), timeout=1)
+
+
+def read_yelp_cache(key):
+    """Returns the cached Yelp body for key, or None if missing, expired or unreadable."""
+    try:
+        with closing(open_yelp_cache()) as conn:
+            row = conn.execute(
+                "SELECT payload FROM yelp_cache WHERE key = ? AND expires_at > ?",
+                (key, int(time.time())),
+            ).fetchone()
+        return orjson.loads(row[0]) if row else None
+    except (sqlite3.Error, orjson.JSONDecodeError):
+        # The disk cache is only an optimization; fall through to Yelp
+        return None
+
+
+def write_yelp_cache(key, payload):
+    """
+    Stores a raw Yelp response body under key for YELP_CACHE_TTL seconds, pruning
+    expired rows in the same transaction so the file doesn't grow without bound.
+    """
+    now = int(time.time())
+    try:
+        with closing(open_yelp_cache()) as conn, conn:
+            conn.execute("DELETE FROM yelp_cache WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "INSERT OR REPLACE INTO yelp_cache (key, payload, expires_at) VALUES (?, ?, ?)",
+                (key, payload, now + YELP_CACHE_TTL),
+            )
+    except sqlite3.Error:
+        pass
+
+
+def fetch_yelp_businesses(city_key, food_key, city, food):
+    """
+    Queries the Yelp search endpoint for city/food (the original wording) and
+    returns (status_code, parsed JSON body). Successful searches are cached on disk
+    for an hour under the normalized (city_key, food_key); SQLite is the only cache
+    layer, so no result is ever served past its expiry. Rate-limit and server
+    errors raise instead of returning.
+    """
+    cache_key = f"{city_key}|{food_key}|{YELP_RESULT_LIMIT}"
+    cached_body = read_yelp_cache(cache_key)
+    if cached_body is not None:
+        return 200, cached_body
+
+    params = {"term": food, "location": city, "limit": YELP_RESULT_LIMIT}
+
+    response = yelp_session.get(YELP_SEARCH_URL, params=params, timeout=YELP_TIMEOUT)
+    if response.status_code == 429 or response.status_code >= 500:
+        response.raise_for_status()
+
+    # orjson parses the raw bytes directly, skipping the text decode step
+    data = orjson.loads(response.content)
+    if response.status_code == 200:
+        write_yelp_cache(cache_key, response.content)
+
+    return response.status_code, data
+
+
+def normalize_term(text):
+    """
+    Lowercases text, drops periods (so "L.A." matches "la") and turns any other
+    punctuation into a space, so "Winston-Salem" and "Coeur D'Alene" keep their
+    word boundaries.
+    """
+    return " ".join(re.sub(r"[^\w\s,]", " ", text.lower().replace(".", "")).split())
+
+
+def normalize_city(city):
+    """Cache key for a city: normalized term with aliases resolved."""
+    key = normalize_term(city)
+    return CITY_ALIASES.get(key, key)
+
+
+def normalize_food(food):
+    """Cache key for a food: normalized term with aliases resolved."""
+    key = normalize_term(food)
+    return FOOD_ALIASES.get(key, key)
+
+
+def search_key(city, food):
+    """The (city, food) pair a search is cached and deduplicated under (never sent to Yelp)."""
+    return normalize_city(city), normalize_food(food)
+
+
 def get_restaurants(city, food):
     global YELP_API_KEY
 
     if not YELP_API_KEY:
         return None, "Yelp API key is missing. Please add YELP_API_KEY to secrets.toml to enable search."
 
-    url = "https://api.yelp.com/v3/businesses/search"
-    headers = {"Authorization": f"Bearer {YELP_API_KEY}"}
-
     if not city or not food:
         return None, "Missing required location or search term (API call prevented)."
 
-    params = {"term": food, "location": city, "limit": 5}
-
     try:
-        response = requests.get(url, headers=headers, params=params)
+        # Every surface form of a search shares one cache entry, but Yelp is sent the
+        # user's original city and food
+        status_code, data = fetch_yelp_businesses(*search_key(city, food), city, food)
 
-        if response.status_code != 200:
-            error_details = response.json().get('error', {}).get('description', 'Unknown API Error.')
-            return None, f"Yelp Request Failed ({response.status_code}): {error_details}"
+        if status_code != 200:
+            error_details = data.get('error', {}).get('description', 'Unknown API Error.')
+            return None, f"Yelp Request Failed ({status_code}): {error_details}"
 
-        data = response.json()
         businesses = data.get("businesses", [])
 
         if not businesses:
@@ -212,11 +637,20 @@ def get_restaurants(city, food):
 
         return businesses, None
 
+    except orjson.JSONDecodeError as parse_e:
+        return None, f"Unreadable response from Yelp: {parse_e}"
+    except requests.exceptions.Timeout:
+        return None, "Yelp Request Timed Out: Yelp is slow to respond right now."
+    except requests.exceptions.HTTPError as http_e:
+        return None, f"Yelp Request Failed ({http_e.response.status_code}): Yelp service error."
     except requests.exceptions.RequestException as req_e:
         return None, f"Network Error contacting Yelp: {req_e}"
 
 
 # ------------------- Streamlit Interface -------------------
+# Display-only prefix for AI messages; the stored text never includes it
+AI_PREFIX = "🤖 "
+
 st.set_page_config(page_title="🍽️ AI Restaurant Finder", layout="centered")
 
 st.title("🍽️ AI Restaurant Finder")
@@ -234,25 +668,99 @@ if "last_food" not in st.session_state:
 # NEW: Track the type of the last successful action (SEARCH or INFO)
 if "last_action_type" not in st.session_state:
     st.session_state.last_action_type = None
+if "messages_truncated" not in st.session_state:
+    st.session_state.messages_truncated = False
+# The same conversation, already formatted for the Gemini chat API
+if "gemini_history" not in st.session_state:
+    st.session_state.gemini_history = []
+# Exact-match extraction memo (normalized input -> result), checked before embedding
+if "extraction_memo" not in st.session_state:
+    st.session_state.extraction_memo = {}
+# Semantic extraction cache: unit embeddings (one row each) and their results
+if "semantic_vectors" not in st.session_state:
+    st.session_state.semantic_vectors = None
+if "semantic_results" not in st.session_state:
+    st.session_state.semantic_results = []
+
+
+def append_message(role, text):
+    """
+    Appends a message to the conversation, evicting the oldest past MAX_MESSAGES,
+    and records its Gemini-formatted counterpart so chat history is never rebuilt.
+    """
+    st.session_state.messages.append((role, text))
+    if len(st.session_state.messages) > MAX_MESSAGES:
+        st.session_state.messages = st.session_state.messages[-MAX_MESSAGES:]
+        st.session_state.messages_truncated = True
+
+    # AI messages are stored without the 🤖 display prefix, so they go to Gemini as-is
+    gemini_role = 'user' if role == 'user' else 'model'
+    st.session_state.gemini_history.append(types.Content(role=gemini_role, parts=[types.Part(text=text)]))
+    # Keep a sliding window of the last MAX_HISTORY_TURNS turns plus the message
+    # currently being answered
+    del st.session_state.gemini_history[:-(2 * MAX_HISTORY_TURNS + 1)]
+
+
+def stream_reply(chunks):
+    """
+    Renders streamed Gemini text into a single assistant bubble as it arrives, with
+    the same prefix replayed messages get, and returns the full (unprefixed) text.
+    """
+    text = ""
+    with st.chat_message("assistant"):
+        placeholder = st.empty()
+        for chunk in chunks:
+            text += chunk
+            placeholder.markdown(f"{AI_PREFIX}{text}")
+    return text
+
 
 # Display conversation
-for role, message in st.session_state.messages:
+if st.session_state.messages_truncated:
+    st.caption("[earlier messages truncated]")
+older_messages = st.session_state.messages[:-MAX_RENDERED_BUBBLES]
+recent_messages = st.session_state.messages[-MAX_RENDERED_BUBBLES:]
+
+# Older turns are only rendered on demand, and then as a single Markdown write
+# (order preserved) instead of one chat_message + markdown pair each, so a normal
+# rerun renders a bounded number of messages however long the session gets.
+if older_messages and st.toggle(f"Show {len(older_messages)} earlier messages", key="show_older_messages"):
+    with st.container():
+        st.markdown("\n\n".join(
+            f"**You:** {message}" if role == "user" else f"{AI_PREFIX}{message}"
+            for role, message in older_messages
+        ))
+
+for role, message in recent_messages:
     if role == "user":
-        st.markdown(f"**You:** {message}")
+        with st.chat_message("user"):
+            st.markdown(message)
     elif role == "ai_result":
         with st.chat_message("assistant"):
-            st.markdown(message)
+            st.markdown(f"{AI_PREFIX}{message}")
 
 # User input
 user_input = st.chat_input("Ask for food and location (e.g., 'Mexican food in Dallas'):")
 
 if user_input:
-    # 1. Add user message to state
-    st.session_state.messages.append(("user", user_input))
+    # 1. Add user message to state and show it right away
+    append_message("user", user_input)
+    with st.chat_message("user"):
+        st.markdown(user_input)
+
+    # 2. Extract structured info and intent using Gemini. When the last turn was a
+    #    search, speculatively start the Yelp search for the remembered city/food on
+    #    a worker thread; it is only used if the final search terms are the same.
+    #    An unused prefetch still runs to completion and only warms the Yelp cache.
+    prefetch_key = None
+    prefetch_future = None
+    if YELP_API_KEY and st.session_state.last_action_type == 'SEARCH' and \
+            st.session_state.last_city and st.session_state.last_food:
+        prefetch_key = (st.session_state.last_city, st.session_state.last_food)
+        prefetch_future = yelp_pool.submit(get_restaurants, *prefetch_key)
 
-    # 2. Extract structured info and intent using Gemini
     with st.spinner("🤖"):
-        city_extracted, food_extracted, intent = extract_structured_info(user_input)
+        city_extracted, food_extracted, intent, drafted_reply = extract_structured_info(user_input)
 
     # Clean and normalize extracted values
     city = city_extracted.title() if city_extracted else None
@@ -271,9 +779,8 @@ if user_input:
     final_food = food if food else st.session_state.last_food
 
     # Final cleanup after memory application
-    invalid_terms = ["null", "none", "n/a", ""]
-    if final_city and final_city.lower() in invalid_terms: final_city = None
-    if final_food and final_food.lower() in invalid_terms: final_food = None
+    if final_city and final_city.lower() in NULL_STRINGS: final_city = None
+    if final_food and final_food.lower() in NULL_STRINGS: final_food = None
 
     # -------------------- ROBUST INTENT OVERRIDE FIX --------------------
     # FIX: Only override to SEARCH if:
@@ -296,21 +803,29 @@ if user_input:
 
     # -------------------- Intent Routing Logic --------------------
     ai_response = ""
+    # Set when the reply was already rendered while streaming
+    response_rendered = False
+
+    # The INFO reply drafted during extraction only saw this message (and is memoized
+    # by its text), so it is reused only when the city didn't come from memory.
+    city_from_memory = final_city and not city
 
     if intent == 'CHAT':
         # --- Conversational Flow (for greetings/casual chat) ---
-        with st.spinner("🤖"):
-            # Pass the conversation history minus the current user message
-            ai_response_text = generate_chat_response(user_input, st.session_state.messages[:-1])
-        ai_response = f"🤖 {ai_response_text}"
+        # Stream the reply so the first tokens show while the rest is generated.
+        # Pass the conversation history minus the current user message.
+        ai_response = stream_reply(generate_chat_response(user_input, st.session_state.gemini_history[:-1]))
+        response_rendered = True
         st.session_state.last_action_type = 'CHAT'  # Update last action
 
     elif intent == 'INFO':
         # --- Informational Flow (suggestions/culture) ---
         # This now correctly fires for "what is the best food to eat in london" AND "what about paris" after the London query.
-        with st.spinner("🤖"):
-            ai_response_text = generate_info_response(user_input, final_city)
-        ai_response = f"🤖 {ai_response_text}"
+        if drafted_reply and not city_from_memory:
+            ai_response = drafted_reply
+        else:
+            ai_response = stream_reply(generate_info_response(user_input, final_city))
+            response_rendered = True
         st.session_state.last_action_type = 'INFO'  # Update last action
 
     elif intent == 'SEARCH':
@@ -322,9 +837,9 @@ if user_input:
             # We are in search flow but are missing information. Generate prompt.
 
             if not final_food:
-                ai_response = f"🤖 I've noted the location as **{final_city}**. Now, what type of cuisine or dish would you like to search for?"
+                ai_response = f"I've noted the location as **{final_city}**. Now, what type of cuisine or dish would you like to search for?"
             elif not final_city:
-                ai_response = f"🤖 Nice! you're looking for **{final_food.title()}**, but I need a location. Which city should I search in?"
+                ai_response = f"Nice! you're looking for **{final_food.title()}**, but I need a location. Which city should I search in?"
 
             st.session_state.last_action_type = 'CHAT'  # Treat prompting as a chat response
 
@@ -332,37 +847,48 @@ if user_input:
             # --- EXECUTE SEARCH ---
             final_food_title = final_food.title()
             with st.spinner(f"🤖 searching for '{final_food}' in '{final_city}'"):
-                restaurants, error = get_restaurants(final_city, final_food)
+                if prefetch_future and search_key(*prefetch_key) == search_key(final_city, final_food):
+                    search_future = prefetch_future
+                else:
+                    search_future = yelp_pool.submit(get_restaurants, final_city, final_food)
+
+                # The search runs on a worker thread, so the turn can give up after a
+                # fixed deadline; a late result still lands in the cache for next time.
+                try:
+                    restaurants, error = search_future.result(timeout=YELP_SEARCH_DEADLINE)
+                except FuturesTimeoutError:
+                    restaurants, error = None, "Yelp Request Timed Out: Yelp is slow to respond right now."
 
             if error:
                 # Convert technical error to conversational AI response
                 if "API key is missing" in error:
-                    ai_response = f"🤖 I need the **YELP_API_KEY** in `secrets.toml` to perform the search. Please add your Yelp API key to continue."
+                    ai_response = f"I need the **YELP_API_KEY** in `secrets.toml` to perform the search. Please add your Yelp API key to continue."
                 elif "Yelp Request Failed (400)" in error:
-                    ai_response = f"🤖 I'm sorry, I couldn't find any results for **{final_food_title}** in **{final_city}**. Yelp might not have data for that specific location or cuisine. Could you try a different city or a more general food type? (e.g. 'Pizza in London, UK')"
+                    ai_response = f"I'm sorry, I couldn't find any results for **{final_food_title}** in **{final_city}**. Yelp might not have data for that specific location or cuisine. Could you try a different city or a more general food type? (e.g. 'Pizza in London, UK')"
+                elif "Yelp Request Timed Out" in error:
+                    ai_response = f"Yelp is slow to respond right now, so I couldn't finish searching for **{final_food_title}** in **{final_city}**. Please try again in a moment."
                 elif "Yelp Request Failed" in error:
-                    ai_response = f"🤖 Uh oh! I ran into a service issue while searching. The Yelp service reported: *{error}*. Please try again shortly."
+                    ai_response = f"Uh oh! I ran into a service issue while searching. The Yelp service reported: *{error}*. Please try again shortly."
                 else:
-                    ai_response = f"🤖 Hmm, an unexpected error occurred: *{error}*. Could you rephrase your request?"
+                    ai_response = f"Hmm, an unexpected error occurred: *{error}*. Could you rephrase your request?"
 
                 st.session_state.last_action_type = 'CHAT'  # Treat error as a chat response
 
             else:
-                # Build the success response string
-                response_parts = [f"🤖 Here are the top {final_food_title} restaurants in {final_city}:"]
-                for r in restaurants:
-                    name = r["name"]
-                    address = r["location"]["address1"]
-                    rating = r["rating"]
-                    maps_query = f"{name}, {final_city}"
-                    maps_url = f"https://www.google.com/maps/search/?api=1&query={maps_query.replace(' ', '+')}"
-                    response_parts.append(f"- [{name}]({maps_url}) | ⭐ **{rating}** | 📍 {address}")
+                # Build the success response string. The encoded city suffix is the same
+                # for every result, so it is computed once.
+                maps_city_suffix = quote_plus(f", {final_city}")
+                response_parts = [f"Here are the top {final_food_title} restaurants in {final_city}:"] + [
+                    f"- [{r['name']}]({MAPS_SEARCH_URL}{quote_plus(r['name'])}{maps_city_suffix})"
+                    f" | ⭐ **{r['rating']}** | 📍 {r['location']['address1']}"
+                    for r in restaurants
+                ]
 
                 ai_response = "\n".join(response_parts)
                 st.session_state.last_action_type = 'SEARCH'  # Update last action
 
-    # 5. Append final AI response
-    st.session_state.messages.append(("ai_result", ai_response))
-
-    # 6. FORCE RERUN to display the new message immediately
-    st.rerun()
+    # 5. Render the AI response in place (no full-script rerun needed) and store it
+    if not response_rendered:
+        with st.chat_message("assistant"):
+            st.markdown(f"{AI_PREFIX}{ai_response}")
+    append_message("ai_result", ai_response)